@@ -21,8 +21,8 @@ def main():
     logger = logging.getLogger(__name__)
     
     try:
-        if not os.getenv('GOOGLE_API_KEY'):
-            logger.error("GOOGLE_API_KEY не найден в .env файле.")
+        if not os.getenv('GOOGLE_API_KEY') and not os.getenv('GOOGLE_API_KEYS'):
+            logger.error("GOOGLE_API_KEY (или GOOGLE_API_KEYS) не найден в .env файле.")
             sys.exit(1)
             
         manager = TranslationManager()
@@ -0,0 +1,46 @@
+import json
+import unittest
+
+from utils.json_stream import JSONArrayStream
+
+
+def _feed_all(chunks):
+    stream = JSONArrayStream()
+    items = []
+    for chunk in chunks:
+        items.extend(stream.feed(chunk))
+    stream.close()
+    return items
+
+
+class JSONArrayStreamTest(unittest.TestCase):
+    def test_every_split_gives_same_items(self):
+        text = '[{"id": 1, "translation": "a, b"}, 1234, -1.5e3, "x]", true, null, [1, 2]]'
+        expected = json.loads(text)
+        for split in range(len(text) + 1):
+            with self.subTest(split=split):
+                self.assertEqual(_feed_all([text[:split], text[split:]]), expected)
+
+    def test_number_split_at_chunk_boundary(self):
+        self.assertEqual(_feed_all(['[12', '34]']), [1234])
+        self.assertEqual(_feed_all(['[1', '.5]']), [1.5])
+
+    def test_items_returned_as_soon_as_complete(self):
+        stream = JSONArrayStream()
+        self.assertEqual(stream.feed('[{"id": 1}, {"id"'), [{'id': 1}])
+        self.assertEqual(stream.feed(': 2}]'), [{'id': 2}])
+        stream.close()
+
+    def test_unfinished_array_fails_on_close(self):
+        stream = JSONArrayStream()
+        stream.feed('[1, 2')
+        with self.assertRaises(json.JSONDecodeError):
+            stream.close()
+
+    def test_not_an_array(self):
+        with self.assertRaises(json.JSONDecodeError):
+            JSONArrayStream().feed('{"id": 1}')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import os
+import unittest
+from unittest import mock
+
+from google.api_core import exceptions
+
+import translator
+from translation_memory import TranslationMemory
+from translator import GeminiTranslator
+from utils.circuit_breaker import CircuitBreaker
+
+
+class _GrpcCall:
+    """Объект вызова gRPC, как в GoogleAPICallError.response: заголовков HTTP у него нет"""
+
+    def code(self):
+        return None
+
+    def details(self):
+        return ''
+
+
+class _FailingModel:
+    """Модель, на каждый запрос отвечающая заданной ошибкой"""
+
+    def __init__(self, error):
+        self.error = error
+        self.calls = 0
+
+    def generate_content(self, *args, **kwargs):
+        self.calls += 1
+        raise self.error
+
+
+class RetryAfterTest(unittest.TestCase):
+    def setUp(self):
+        with mock.patch.dict(os.environ, {'GOOGLE_API_KEY': 'test-key', 'GEMINI_RPM': '0', 'GEMINI_TPM': '0'}):
+            self.translator = GeminiTranslator(TranslationMemory(':memory:', namespace='test'))
+        self.translator.retry_delay = 0
+        self.slot = self.translator._keys[0]
+        self.slot.cooldown_until = 0.0
+        breaker_patch = mock.patch.object(translator, '_BREAKER', CircuitBreaker(failure_threshold=5, cooldown=30.0))
+        self.breaker = breaker_patch.start()
+        self.addCleanup(breaker_patch.stop)
+
+    def test_grpc_service_unavailable_is_retried(self):
+        error = exceptions.ServiceUnavailable('overloaded', response=_GrpcCall())
+        self.assertIsNone(self.translator._server_retry_delay(error))
+        delay = self.translator._retry_after(0, self.slot, error)
+        self.assertIsNotNone(delay)
+        self.assertGreaterEqual(delay, 0)
+
+    def test_grpc_quota_without_retry_info_cools_down_key(self):
+        error = exceptions.ResourceExhausted('quota exceeded', response=_GrpcCall())
+        self.assertEqual(self.translator._retry_after(0, self.slot, error), 0.0)
+        self.assertIsNone(self.translator._retry_after(self.translator.max_retries - 1, self.slot, error))
+
+    def test_rest_retry_after_header(self):
+        response = mock.Mock(headers={'Retry-After': '7'})
+        error = exceptions.ServiceUnavailable('overloaded', response=response)
+        self.assertEqual(self.translator._server_retry_delay(error), 7.0)
+
+    def test_outage_is_retried_and_counted_by_breaker(self):
+        model = _FailingModel(exceptions.ServiceUnavailable('overloaded', response=_GrpcCall()))
+        self.slot.model = model
+        self.assertEqual(self.translator.translate_batch(['Hello world']), [None])
+        self.assertEqual(model.calls, self.translator.max_retries)
+        self.assertEqual(self.breaker._failures, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
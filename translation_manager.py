@@ -1,53 +1,131 @@
 import os
+import stat
+import sys
+import asyncio
+import glob
+import hashlib
 import shutil
 import polib
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from pathlib import Path
 from datetime import datetime
 from tqdm import tqdm
-from translator import GeminiTranslator
+from translator import GeminiTranslator, needs_translation, passthrough_translation, run_async
+from utils.file_utils import copy_file, link_or_copy
+from utils.po_parser import PARALLEL_PARSE_MIN_SIZE, load_po_parallel
+from utils.po_writer import save_po_streaming
+from utils.key_watcher import KeyWatcher
 import logging
-import msvcrt
 
 logger = logging.getLogger(__name__)
 
+# Максимум файлов, обрабатываемых одновременно в пакетном режиме
+MAX_PARALLEL_FILES = 8
+
+# Сколько готовых пакетов может ждать применения, прежде чем воркеры приостановятся
+RESULTS_QUEUE_SIZE = 100
+
+# Возвращается обработчиком пункта меню, чтобы завершить работу с файлом
+_EXIT_MENU = object()
+
+# Формы множественного числа, которые должен вернуть переводчик
+PLURAL_FORM_KEYS = frozenset(('one', 'few', 'many', 'other'))
+
 class TranslationManager:
-    def __init__(self):
-        self.translator = GeminiTranslator()
+    def __init__(self, translator=None):
+        # Переводчик (вместе с его памятью переводов) можно разделить между несколькими менеджерами
+        self.translator = translator or GeminiTranslator()
         self.current_file = None
         self.backup_dir = "backups"
         self.ensure_backup_dir()
-        self.modified_entries = set()
+        # Записи, в которые писали перевод с момента последнего сохранения: id(entry) -> entry.
+        # POEntry хэшируется по содержимому, поэтому ключом служит id.
+        self.modified_entries = {}
+        # Хэши исходного перевода для записей из modified_entries: id(entry) -> int.
+        # Снимок делается перед первой записью, а не для каждой записи при загрузке.
+        self._baseline_hashes = {}
+        # Индекс непереведенных записей текущего файла: id(entry) -> entry
+        self._untranslated = {}
+        # Число записей с msgid в текущем файле
+        self._total = 0
         self.translation_interrupted = False
+        # Обработчики пунктов меню process_file
+        self._menu_actions = {
+            '1': self._menu_show_stats,
+            '2': self._menu_show_untranslated,
+            '3': self._menu_translate,
+            '4': self._menu_edit_unsaved,
+            '5': self._menu_save,
+            '6': self._menu_exit,
+        }
 
     def ensure_backup_dir(self):
         """Создаем директорию для бэкапов, если её нет"""
-        if not os.path.exists(self.backup_dir):
-            os.makedirs(self.backup_dir)
+        os.makedirs(self.backup_dir, exist_ok=True)
 
     def create_backup(self, file_path):
         """Создаем резервную копию файла"""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_path = os.path.join(
-            self.backup_dir,
-            f"{Path(file_path).stem}_{timestamp}.po"
-        )
-        shutil.copy2(file_path, backup_path)
+        # В пакетном режиме у файлов из разных каталогов одно имя (locales/*/LC_MESSAGES/messages.po),
+        # поэтому в имя копии входит хэш каталога исходного файла
+        source_dir = os.path.dirname(os.path.abspath(file_path))
+        dir_hash = hashlib.sha256(source_dir.encode('utf-8', 'surrogateescape')).hexdigest()[:8]
+        base_name = f"{Path(file_path).stem}_{dir_hash}_{timestamp}"
+        # Файл сохраняется через временный файл и os.replace, поэтому жесткая ссылка
+        # продолжает указывать на прежнее содержимое и служит резервной копией без копирования данных.
+        # Существующие копии не перезаписываются: при совпадении имени добавляется номер
+        backup_path = os.path.join(self.backup_dir, f"{base_name}.po")
+        number = 0
+        while True:
+            try:
+                link_or_copy(file_path, backup_path)
+                break
+            except FileExistsError:
+                number += 1
+                backup_path = os.path.join(self.backup_dir, f"{base_name}_{number}.po")
         logger.info(f"Создана резервная копия: {backup_path}")
         return backup_path
 
     def load_po_file(self, file_path):
         """Загружаем PO файл"""
         try:
-            po = polib.pofile(file_path, encoding='utf-8')
+            # Большие каталоги можно разбирать в нескольких процессах (PO_PARALLEL_PARSE=1)
+            if os.getenv('PO_PARALLEL_PARSE') == '1' and os.path.getsize(file_path) >= PARALLEL_PARSE_MIN_SIZE:
+                po = load_po_parallel(file_path, encoding='utf-8')
+            else:
+                po = polib.pofile(file_path, encoding='utf-8')
             
+            # Один проход: индекс непереведенных записей
+            self._untranslated = {}
+            self._total = 0
+            self.modified_entries = {}
+            self._baseline_hashes = {}
+            # Одинаковые строки (переводы "Да"/"Нет", повторяющиеся msgid_plural, формы
+            # множественного числа) храним одним объектом str. С PO_INTERN_STRINGS=1 строки
+            # интернируются и разделяются между всеми файлами процесса
+            if os.getenv('PO_INTERN_STRINGS') == '1':
+                intern = sys.intern
+            else:
+                string_pool = {}
+
+                def intern(text):
+                    return string_pool.setdefault(text, text)
+
             for entry in po:
                 if not entry.msgid and not entry.msgid_plural:
                     continue
-                if not hasattr(entry, 'original_msgstr'):
-                    entry.original_msgstr = entry.msgstr
-                if hasattr(entry, 'msgid_plural'):
-                    if not hasattr(entry, 'original_msgstr_plural'):
-                        entry.original_msgstr_plural = entry.msgstr_plural.copy() if hasattr(entry, 'msgstr_plural') else {}
+                entry.msgid = intern(entry.msgid)
+                entry.msgstr = intern(entry.msgstr)
+                if entry.msgid_plural:
+                    entry.msgid_plural = intern(entry.msgid_plural)
+                    msgstr_plural = entry.msgstr_plural
+                    for index, form in msgstr_plural.items():
+                        msgstr_plural[index] = intern(form)
+                if entry.msgid:
+                    self._total += 1
+                    if not self._is_translated(entry):
+                        self._untranslated[id(entry)] = entry
             
             po.metadata['Content-Type'] = 'text/plain; charset=utf-8'
             po.metadata['Content-Transfer-Encoding'] = '8bit'
@@ -67,46 +145,43 @@ class TranslationManager:
         print(f"Не переведено: {stats['untranslated']}")
         print(f"Процент перевода: {stats['percent_translated']}%\n")
 
-    def get_untranslated_entries(self, po):
-        """Получаем список непереведенных записей"""
-        untranslated = []
-        for entry in po:
-            if not entry.msgid:
-                continue
-            if 'fuzzy' in entry.flags:
-                untranslated.append(entry)
-                continue
+    @staticmethod
+    def _is_translated(entry):
+        """Проверяем, считается ли запись переведенной"""
+        # Вызывается для каждой записи при загрузке: каждый атрибут читаем не более одного раза
+        flags = entry.flags
+        if flags and 'fuzzy' in flags:
+            return False
+        if entry.msgstr:
+            return True
+        if entry.msgid_plural:
+            msgstr_plural = entry.msgstr_plural
+            return bool(msgstr_plural) and any(msgstr_plural.values())
+        return False
 
-            is_translated = False
+    def _update_index(self, entry):
+        """Обновляем индекс непереведенных записей после изменения перевода"""
+        if not entry.msgid:
+            return
+        if self._is_translated(entry):
+            self._untranslated.pop(id(entry), None)
+        else:
+            self._untranslated.setdefault(id(entry), entry)
 
-            if entry.msgid_plural:
-                if entry.msgstr or (entry.msgstr_plural and any(entry.msgstr_plural.values())):
-                    is_translated = True
-            else:
-                if entry.msgstr:
-                    is_translated = True
-            
-            if not is_translated:
-                untranslated.append(entry)
-        
-        return untranslated
+    def iter_untranslated_entries(self, po):
+        """Перебираем непереведенные записи из индекса, не создавая список"""
+        return iter(self._untranslated.values())
 
-    def get_translation_stats(self, po):
-        """Получаем статистику по переводам"""
-        entries = [e for e in po if e.msgid]
-        total = len(entries)
-        translated = 0
+    def get_untranslated_entries(self, po):
+        """Получаем список непереведенных записей из индекса, построенного при загрузке"""
+        return list(self._untranslated.values())
 
-        for entry in entries:
-            if 'fuzzy' in entry.flags:
-                continue
+    def get_translation_stats(self, po):
+        """Получаем статистику по переводам без повторного прохода по файлу"""
+        total = self._total
+        # Индекс непереведенных записей обновляется при каждой записи перевода
+        translated = total - len(self._untranslated)
 
-            if entry.msgid_plural:
-                if entry.msgstr or (entry.msgstr_plural and any(entry.msgstr_plural.values())):
-                    translated += 1
-            elif entry.msgstr:
-                translated += 1
-                
         return {
             'total': total,
             'translated': translated,
@@ -114,13 +189,15 @@ class TranslationManager:
             'percent_translated': round((translated / total * 100), 2) if total > 0 else 0
         }
 
-    def print_untranslated(self, entries, count=10):
+    def print_untranslated(self, entries, count=10, total=None):
         """Выводим непереведенные строки"""
         if not entries:
             print("Нет непереведенных строк!")
             return
+        if total is None:
+            total = len(entries)
             
-        print(f"\n=== Непереведенные строки (показано {min(count, len(entries))} из {len(entries)}) ===\n")
+        print(f"\n=== Непереведенные строки (показано {min(count, len(entries))} из {total}) ===\n")
         
         for i, entry in enumerate(entries[:count], 1):
             print(f"{i}. [Исходный] {entry.msgid}")
@@ -133,7 +210,7 @@ class TranslationManager:
     def _process_translation_result(self, entry, translation):
         """Обрабатывает результат перевода для одной записи"""
         if not translation or not isinstance(translation, dict):
-            logger.error(f"Неверный формат перевода: {translation} для msgid: '{entry.msgid}'")
+            logger.error("Неверный формат перевода: %s для msgid: '%s'", translation, entry.msgid)
             return False
             
         try:
@@ -143,29 +220,31 @@ class TranslationManager:
                     entry.msgstr = text
                     return True
             elif translation.get('type') == 'plural':
-                forms = translation.get('forms', {})
-                if forms and all(k in forms for k in ['one', 'few', 'many', 'other']):
+                forms = translation.get('forms')
+                if forms and PLURAL_FORM_KEYS <= forms.keys():
                     # polib ожидает ключи 0, 1, 2 для русского языка.
                     # one -> 0, few -> 1, many -> 2
-                    entry.msgstr_plural[0] = forms['one']
-                    entry.msgstr_plural[1] = forms['few']
-                    entry.msgstr_plural[2] = forms['many']
+                    one = forms['one']
+                    entry.msgstr_plural.update({0: one, 1: forms['few'], 2: forms['many']})
                     
                     # Устанавливаем msgstr в первую форму по умолчанию
-                    entry.msgstr = forms['one']
+                    entry.msgstr = one
                     return True
             return False
         except Exception as e:
-            logger.error(f"Ошибка при обработке перевода для '{entry.msgid}': {e}", exc_info=True)
+            logger.error("Ошибка при обработке перевода для '%s': %s", entry.msgid, e, exc_info=True)
             return False
 
-    def _check_key_press(self):
-        """Проверяет нажатие клавиш Esc или Enter"""
-        if msvcrt.kbhit():
-            key = msvcrt.getch()
-            if key in (b'\x1b', b'\r', b'\n'):  # Esc, Enter
-                return True
-        return False
+    def _apply_translation(self, entry, translation):
+        """Записывает перевод в запись и снимает с неё флаг fuzzy"""
+        self._mark_modified(entry)
+        applied = self._process_translation_result(entry, translation)
+        if applied:
+            if 'fuzzy' in entry.flags:
+                entry.flags.remove('fuzzy')
+            self._update_index(entry)
+        self._settle_modified(entry)
+        return applied
 
     def translate_entries(self, po, entries_to_translate, batch_size_override=None):
         """Переводим непереведенные записи пакетами с возможностью прерывания"""
@@ -179,58 +258,30 @@ class TranslationManager:
         print(f"\nНачинаем перевод {len(entries_to_translate)} строк...")
         print("Нажмите Esc, Enter или Ctrl+C для прерывания перевода")
         
-        entries_to_process = [e for e in entries_to_translate if e.msgid.strip()]
-        if not entries_to_process:
-            print("Нет валидных строк для перевода!")
-            return 0
+        unique_entries, translated_count = self._group_entries(entries_to_translate)
+
+        if translated_count:
+            print(f"Скопировано строк без текста: {translated_count}")
+        if not unique_entries:
+            if not translated_count:
+                print("Нет валидных строк для перевода!")
+            return translated_count
             
-        translated_count = 0
-        batch_size = self.translator.BATCH_SIZE
-        total_entries = len(entries_to_process)
+        batches = self._make_batches(unique_entries)
+        total_entries = sum(len(group) for group in unique_entries.values())
         self.translation_interrupted = False
+        # Счетчик обновляется по мере готовности пакетов, поэтому переживает Ctrl+C
+        progress = {'translated': translated_count}
         
         try:
-            with tqdm(total=total_entries, desc="Перевод строк") as pbar:
-                for i in range(0, total_entries, batch_size):
-                    # Проверяем нажатие клавиш
-                    if self._check_key_press():
-                        print("\nОбнаружено прерывание пользователем...")
-                        self.translation_interrupted = True
-                        break
-                        
-                    batch_entries = entries_to_process[i:i + batch_size]
-                    
-                    batch_to_translate = []
-                    for entry in batch_entries:
-                        if entry.msgid_plural:
-                            batch_to_translate.append({
-                                'msgid': entry.msgid,
-                                'msgid_plural': entry.msgid_plural
-                            })
-                        else:
-                            batch_to_translate.append(entry.msgid)
-                    
-                    try:
-                        translations = self.translator.translate_batch(batch_to_translate)
-                        
-                        for entry, translation in zip(batch_entries, translations):
-                            if self._process_translation_result(entry, translation):
-                                translated_count += 1
-                                if 'fuzzy' in entry.flags:
-                                    entry.flags.remove('fuzzy')
-                                
-                    except Exception as e:
-                        logger.error(f"Ошибка при пакетном переводе: {e}", exc_info=True)
-                        # Продолжаем со следующим пакетом, если произошла ошибка
-                        continue
-                    
-                    pbar.update(len(batch_entries))
-                    pbar.set_postfix({'переведено': f"{translated_count}/{pbar.n}"})
+            with tqdm(total=total_entries, desc="Перевод строк", miniters=max(1, total_entries // 100)) as pbar:
+                self._run_async(self._translate_all(unique_entries, batches, pbar, progress))
                     
         except KeyboardInterrupt:
             print("\nПеревод прерван пользователем (Ctrl+C)")
             self.translation_interrupted = True
         
+        translated_count = progress['translated']
         if self.translation_interrupted:
             print(f"\nПеревод прерван. Успешно переведено {translated_count} строк.")
         else:
@@ -238,6 +289,141 @@ class TranslationManager:
             
         return translated_count
 
+    def _group_entries(self, entries_to_translate):
+        """Группируем записи по исходному тексту; строки без текста сразу копируем в перевод
+        
+        Returns:
+            tuple: (словарь (msgid, msgid_plural) -> записи, число скопированных записей)
+        """
+        translated_count = 0
+        # Одинаковые строки (например, "OK" или "Cancel") переводим один раз:
+        # ключ - исходный текст, значение - все записи с этим текстом
+        unique_entries = {}
+        for entry in entries_to_translate:
+            if not entry.msgid.strip():
+                continue
+            if not needs_translation(entry.msgid):
+                if self._apply_translation(entry, passthrough_translation(entry.msgid, entry.msgid_plural)):
+                    translated_count += 1
+                continue
+            unique_entries.setdefault((entry.msgid, entry.msgid_plural), []).append(entry)
+        return unique_entries, translated_count
+
+    def _make_batches(self, unique_entries):
+        """Раскладываем уникальные ключи по корзинам длины и разбиваем каждую на пакеты для API
+        
+        Returns:
+            list: пары (индекс корзины, ключи пакета), короткие строки первыми
+        """
+        buckets = [[] for _ in self.translator.LENGTH_BUCKETS]
+        for key in unique_entries:
+            buckets[self.translator.bucket_for(key[0])].append(key)
+
+        batches = []
+        for index, keys in enumerate(buckets):
+            batch_size = self.translator.LENGTH_BUCKETS[index][1]
+            batches.extend((index, batch_keys) for batch_keys in self.translator.pack_batches(keys, batch_size))
+        return batches
+
+    def _make_semaphores(self):
+        """Общий лимит одновременных запросов и отдельные лимиты для каждой корзины длины"""
+        return (
+            asyncio.Semaphore(self.translator.max_concurrent),
+            [asyncio.Semaphore(max_concurrent) for _, _, max_concurrent, _ in self.translator.LENGTH_BUCKETS],
+        )
+
+    def _run_async(self, coro):
+        """Выполняем корутину в общем цикле событий процесса: асинхронный клиент Gemini привязан к нему"""
+        return run_async(coro)
+
+    @staticmethod
+    def _build_batch_payload(batch_keys):
+        """Готовит пакет для GeminiTranslator из ключей (msgid, msgid_plural)"""
+        batch_to_translate = []
+        for msgid, msgid_plural in batch_keys:
+            if msgid_plural:
+                batch_to_translate.append({
+                    'msgid': msgid,
+                    'msgid_plural': msgid_plural
+                })
+            else:
+                batch_to_translate.append(msgid)
+        return batch_to_translate
+
+    async def _translate_all(self, unique_entries, batches, pbar, progress, semaphores=None, check_keys=True):
+        """Воркеры отправляют пакеты в API, а переводы применяются по мере поступления в очередь результатов"""
+        if semaphores is None:
+            semaphores = self._make_semaphores()
+        total_semaphore, bucket_semaphores = semaphores
+
+        # У каждой корзины своя очередь пакетов и столько воркеров, сколько ей разрешено запросов:
+        # длинные строки не задерживают короткие
+        bucket_queues = [asyncio.Queue() for _ in self.translator.LENGTH_BUCKETS]
+        for bucket, batch_keys in batches:
+            bucket_queues[bucket].put_nowait(batch_keys)
+        results = asyncio.Queue(maxsize=RESULTS_QUEUE_SIZE)
+
+        # Esc/Enter отслеживает отдельный поток: прерывание срабатывает сразу,
+        # а не после ответа на очередной пакет
+        watcher = None
+        if check_keys:
+            loop = asyncio.get_running_loop()
+
+            def wake_consumer():
+                if not results.full():
+                    results.put_nowait(None)
+
+            def on_press():
+                self.translation_interrupted = True
+                loop.call_soon_threadsafe(wake_consumer)
+
+            watcher = KeyWatcher(on_press)
+            watcher.start()
+
+        async def worker(bucket):
+            queue = bucket_queues[bucket]
+            timeout = self.translator.LENGTH_BUCKETS[bucket][3]
+            while not queue.empty():
+                batch_keys = queue.get_nowait()
+                try:
+                    async with bucket_semaphores[bucket], total_semaphore:
+                        translations = await self.translator.translate_batch_async(
+                            self._build_batch_payload(batch_keys), timeout=timeout)
+                except Exception as e:
+                    logger.error("Ошибка при отправке пакета: %s", e, exc_info=True)
+                    translations = [None] * len(batch_keys)
+                await results.put((batch_keys, translations))
+
+        workers = [
+            asyncio.create_task(worker(bucket))
+            for bucket, (_, _, max_concurrent, _) in enumerate(self.translator.LENGTH_BUCKETS)
+            for _ in range(min(max_concurrent, bucket_queues[bucket].qsize()))
+        ]
+        try:
+            for _ in range(len(batches)):
+                result = await results.get()
+                if self.translation_interrupted:
+                    print("\nОбнаружено прерывание пользователем...")
+                    break
+                batch_keys, translations = result
+                try:
+                    for key, translation in zip(batch_keys, translations):
+                        for entry in unique_entries[key]:
+                            if self._apply_translation(entry, translation):
+                                progress['translated'] += 1
+                except Exception as e:
+                    logger.error("Ошибка при пакетном переводе: %s", e, exc_info=True)
+
+                pbar.update(sum(len(unique_entries[key]) for key in batch_keys))
+                # Без немедленной перерисовки: tqdm обновит строку сам с ограничением частоты
+                pbar.set_postfix_str(f"переведено={progress['translated']}/{pbar.n}", refresh=False)
+        finally:
+            if watcher is not None:
+                watcher.stop()
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
     def save_po_file(self, po, file_path):
         """Сохраняет PO файл"""
         try:
@@ -250,14 +436,12 @@ class TranslationManager:
             self.create_backup(file_path)
             
             logger.info(f"Попытка сохранения файла: {file_path}")
-            po.save(file_path) 
+            # Запись по одной записи во временный файл с атомарной подменой вместо po.save
+            save_po_streaming(po, file_path)
             
-            # Сбрасываем флаги изменений после успешного сохранения
-            for entry in po:
-                if hasattr(entry, 'original_msgstr'):
-                    entry.original_msgstr = entry.msgstr
-                if hasattr(entry, 'original_msgstr_plural') and hasattr(entry, 'msgstr_plural'):
-                    entry.original_msgstr_plural = entry.msgstr_plural.copy()
+            # Сбрасываем отслеживание изменений после успешного сохранения
+            self.modified_entries.clear()
+            self._baseline_hashes.clear()
             
             success_msg = f"Файл успешно сохранен: {file_path}"
             print(success_msg)
@@ -270,36 +454,50 @@ class TranslationManager:
             logger.error(error_msg, exc_info=True)
             return False
 
+    @staticmethod
+    def _entry_hash(entry):
+        """Хэш переводимого состояния записи: msgstr, формы множественного числа и флаг fuzzy"""
+        msgstr_plural = entry.msgstr_plural
+        if not msgstr_plural:
+            plural = ()
+        elif len(msgstr_plural) <= 3:
+            # В русском каталоге форм три: фиксированный кортеж без сортировки словаря
+            plural = (msgstr_plural.get(0, ''), msgstr_plural.get(1, ''), msgstr_plural.get(2, ''))
+        else:
+            plural = tuple(sorted(msgstr_plural.items()))
+        return hash((entry.msgstr, plural, 'fuzzy' in entry.flags))
+
+    def _is_changed(self, entry):
+        """Сравниваем перевод записи с сохраненным снимком"""
+        baseline = self._baseline_hashes.get(id(entry))
+        return baseline is not None and self._entry_hash(entry) != baseline
+
     def has_unsaved_changes(self, po):
         """Проверяем, есть ли несохраненные изменения"""
-        for entry in po:
-            if not hasattr(entry, 'original_msgstr'): # Новая, еще не сохраненная запись
-                if entry.msgstr or entry.msgstr_plural:
-                    return True
-                continue
-            
-            # Проверяем обычные строки
-            if entry.msgstr != entry.original_msgstr:
-                return True
-                
-            # Проверяем множественные формы
-            if hasattr(entry, 'msgid_plural'):
-                current_plural = entry.msgstr_plural if hasattr(entry, 'msgstr_plural') else {}
-                if current_plural != entry.original_msgstr_plural:
-                    return True
-                    
-        return False
+        # В modified_entries остаются только действительно измененные записи
+        return bool(self.modified_entries)
+
+    @staticmethod
+    def _preview(text, limit=80):
+        """Сокращаем строку для вывода; короткие строки возвращаем без копирования"""
+        return text if len(text) <= limit else f"{text[:limit]}..."
+
+    def _mark_modified(self, entry):
+        """Запоминаем запись перед записью перевода вместе с хэшем исходного значения"""
+        key = id(entry)
+        if key not in self._baseline_hashes:
+            self._baseline_hashes[key] = self._entry_hash(entry)
+            self.modified_entries[key] = entry
+
+    def _settle_modified(self, entry):
+        """После записи убираем запись из измененных, если она совпала с исходной"""
+        if not self._is_changed(entry):
+            self.modified_entries.pop(id(entry), None)
+            self._baseline_hashes.pop(id(entry), None)
 
     def get_modified_entries(self, po):
         """Получаем список измененных, но не сохраненных записей"""
-        modified = []
-        for entry in po:
-            if hasattr(entry, 'original_msgstr') and entry.msgstr != entry.original_msgstr:
-                modified.append(entry)
-            elif hasattr(entry, 'original_msgstr_plural'):
-                if not hasattr(entry, 'msgstr_plural') or entry.msgstr_plural != entry.original_msgstr_plural:
-                    modified.append(entry)
-        return modified
+        return list(self.modified_entries.values())
 
     def view_and_edit_unsaved(self, po):
         """Просмотр и редактирование несохраненных изменений"""
@@ -312,8 +510,8 @@ class TranslationManager:
         while True:
             print("\n=== Несохраненные изменения ===")
             for i, entry in enumerate(modified_entries, 1):
-                print(f"{i}. [Исходный] {entry.msgid[:80]}{'...' if len(entry.msgid) > 80 else ''}")
-                print(f"   [Перевод]  {entry.msgstr[:80]}{'...' if len(entry.msgstr) > 80 else ''}\n")
+                print(f"{i}. [Исходный] {self._preview(entry.msgid)}")
+                print(f"   [Перевод]  {self._preview(entry.msgstr)}\n")
             
             
             while True:
@@ -339,10 +537,10 @@ class TranslationManager:
             new_translation = input("\nВведите новый перевод (или Enter для отмены): ").strip()
             if new_translation:
                 # Сохраняем оригинальное значение, если это первое изменение
-                if not hasattr(selected_entry, 'original_msgstr'):
-                    selected_entry.original_msgstr = selected_entry.msgstr
-                    
+                self._mark_modified(selected_entry)
                 selected_entry.msgstr = new_translation
+                self._update_index(selected_entry)
+                self._settle_modified(selected_entry)
                 print("Перевод обновлен.")
                 # Обновляем список измененных записей
                 modified_entries = self.get_modified_entries(po)
@@ -352,11 +550,144 @@ class TranslationManager:
     def ensure_original_backup(self, file_path):
         """Создаем резервную копию с суффиксом _original, если её нет"""
         backup_path = file_path.replace('.po', '_original.po')
-        if not os.path.exists(backup_path):
-            shutil.copy2(file_path, backup_path)
-            logger.info(f"Создана резервная копия: {backup_path}")
+        # Режим 'x' атомарно проверяет отсутствие файла, отдельный os.path.exists не нужен
+        try:
+            copy_file(file_path, backup_path, exclusive=True)
+        except FileExistsError:
+            return backup_path
+        shutil.copystat(file_path, backup_path)
+        logger.info(f"Создана резервная копия: {backup_path}")
         return backup_path
 
+    async def _prepare_file(self, file_path, executor=None):
+        """Параллельно создаем резервную копию _original и разбираем PO файл в потоках"""
+        loop = asyncio.get_running_loop()
+        return await asyncio.gather(
+            loop.run_in_executor(executor, self.ensure_original_backup, file_path),
+            loop.run_in_executor(executor, self.load_po_file, file_path),
+        )
+
+    async def process_file_noninteractive(self, file_path, executor=None, semaphores=None):
+        """Переводим все непереведенные строки файла и сохраняем его без участия пользователя.
+        Ошибка обработки одного файла не прерывает пакет: она логируется, а файл считается неудачным."""
+        try:
+            return await self._process_file_noninteractive(file_path, executor, semaphores)
+        except Exception as e:
+            logger.error("Ошибка при обработке файла %s: %s", file_path, e, exc_info=True)
+            return False
+
+    async def _process_file_noninteractive(self, file_path, executor, semaphores):
+        """Перевод и сохранение одного файла для process_file_noninteractive"""
+        loop = asyncio.get_running_loop()
+        self.current_file = file_path
+        _, po = await self._prepare_file(file_path, executor)
+        if not po:
+            return False
+
+        unique_entries, cached_count = self._group_entries(self.get_untranslated_entries(po))
+        progress = {'translated': cached_count}
+        if unique_entries:
+            total_entries = sum(len(group) for group in unique_entries.values())
+            with tqdm(total=total_entries, desc=Path(file_path).name, miniters=max(1, total_entries // 100)) as pbar:
+                await self._translate_all(unique_entries, self._make_batches(unique_entries), pbar,
+                                          progress, semaphores=semaphores, check_keys=False)
+
+        logger.info(f"{file_path}: переведено {progress['translated']} строк")
+        if not self.modified_entries:
+            return True
+        return await loop.run_in_executor(executor, self.save_po_file, po, file_path)
+
+    async def _process_files_async(self, file_paths):
+        """Обрабатываем несколько файлов одновременно с общим лимитом запросов к API"""
+        semaphores = self._make_semaphores()
+        with ThreadPoolExecutor(max_workers=min(MAX_PARALLEL_FILES, len(file_paths))) as executor:
+            # У каждого файла свое состояние (индексы, изменения), переводчик и память общие
+            workers = [TranslationManager(self.translator) for _ in file_paths]
+            return await asyncio.gather(*(
+                worker.process_file_noninteractive(path, executor, semaphores)
+                for worker, path in zip(workers, file_paths)
+            ))
+
+    def process_files(self, file_paths):
+        """Пакетный режим: переводим и сохраняем все указанные файлы"""
+        print(f"\nПакетная обработка {len(file_paths)} файлов...")
+        try:
+            results = self._run_async(self._process_files_async(file_paths))
+        except KeyboardInterrupt:
+            print("\nПакетная обработка прервана пользователем (Ctrl+C)")
+            return False
+
+        for path, ok in zip(file_paths, results):
+            print(f"{'OK' if ok else 'Ошибка'}: {path}")
+        return all(results)
+
+    def _menu_show_stats(self, po, file_path):
+        """Пункт меню 1: статистика"""
+        stats = self.get_translation_stats(po)
+        self.print_stats(stats)
+
+    def _menu_show_untranslated(self, po, file_path):
+        """Пункт меню 2: непереведенные строки"""
+        # Для вывода нужны только число строк и первые count записей - весь список не строим
+        untranslated_count = self.get_translation_stats(po)['untranslated']
+        if not untranslated_count:
+            print("Все строки переведены!")
+            return
+        count = input(f"Сколько строк показать (макс {untranslated_count}): ").strip()
+        try:
+            count = min(int(count), untranslated_count) if count else 10
+            shown = list(islice(self.iter_untranslated_entries(po), count))
+            self.print_untranslated(shown, count, total=untranslated_count)
+        except ValueError:
+            print("Некорректное число!")
+
+    def _menu_translate(self, po, file_path):
+        """Пункт меню 3: перевод строк"""
+        untranslated_count = self.get_translation_stats(po)['untranslated']
+        if not untranslated_count:
+            print("Нет непереведенных строк!")
+            return
+            
+        print(f"\nНайдено {untranslated_count} непереведенных строк.")
+        batch = input(f"Сколько строк перевести (Enter для всех, 0 для отмены): ").strip()
+        
+        try:
+            batch_size_override = int(batch) if batch else None
+            if batch_size_override == 0:
+                return
+                
+            untranslated = self.iter_untranslated_entries(po)
+            if batch_size_override is not None and batch_size_override > 0:
+                untranslated = islice(untranslated, batch_size_override)
+            translated_count = self.translate_entries(po, list(untranslated), batch_size_override)
+            
+            # Обновляем статистику, только если перевод не был прерван
+            if not self.translation_interrupted:
+                print(f"\nУспешно переведено {translated_count} строк.")
+                stats = self.get_translation_stats(po)
+                self.print_stats(stats)
+            
+        except ValueError:
+            print("Некорректный ввод!")
+
+    def _menu_edit_unsaved(self, po, file_path):
+        """Пункт меню 4: несохраненные изменения"""
+        self.view_and_edit_unsaved(po)
+
+    def _menu_save(self, po, file_path):
+        """Пункт меню 5: сохранение"""
+        if self.save_po_file(po, file_path):  # Сохраняем в исходный файл
+            print("Изменения успешно сохранены!")
+
+    def _menu_exit(self, po, file_path):
+        """Пункт меню 6: выход из работы с файлом"""
+        if self.has_unsaved_changes(po):
+            save_choice = input("\nЕсть несохраненные изменения. Сохранить перед выходом? (y/N): ").strip().lower()
+            if save_choice == 'y':
+                self.save_po_file(po, file_path)
+        print("Завершение работы с файлом.")
+        return _EXIT_MENU
+
     def process_file(self, file_path, batch_size=None):
         """Обработка одного PO файла"""
         # Проверяем существование файла
@@ -378,13 +709,10 @@ class TranslationManager:
         
         self.current_file = file_path
         
-        # Создаем резервную копию с суффиксом _original, если её нет
-        original_backup = self.ensure_original_backup(file_path)
-        print(f"Резервная копия: {original_backup}")
-        
-        # Загружаем файл
+        # Создаем резервную копию с суффиксом _original (если её нет) и загружаем файл
         print("Загрузка файла...")
-        po = self.load_po_file(file_path)
+        original_backup, po = self._run_async(self._prepare_file(file_path))
+        print(f"Резервная копия: {original_backup}")
         if not po:
             return False
             
@@ -400,71 +728,35 @@ class TranslationManager:
             
             choice = input("\nВаш выбор (1-6): ").strip()
             
-            if choice == '1':
-                stats = self.get_translation_stats(po)
-                self.print_stats(stats)
-                
-            elif choice == '2':
-                untranslated = self.get_untranslated_entries(po)
-                if not untranslated:
-                    print("Все строки переведены!")
-                    continue
-                count = input(f"Сколько строк показать (макс {len(untranslated)}): ").strip()
-                try:
-                    count = min(int(count), len(untranslated)) if count else 10
-                    self.print_untranslated(untranslated, count)
-                except ValueError:
-                    print("Некорректное число!")
-                    
-            elif choice == '3':
-                untranslated = self.get_untranslated_entries(po)
-                if not untranslated:
-                    print("Нет непереведенных строк!")
-                    continue
-                    
-                print(f"\nНайдено {len(untranslated)} непереведенных строк.")
-                batch = input(f"Сколько строк перевести (Enter для всех, 0 для отмены): ").strip()
-                
-                try:
-                    batch_size_override = int(batch) if batch else None
-                    if batch_size_override == 0:
-                        continue
-                        
-                    translated_count = self.translate_entries(po, untranslated, batch_size_override)
-                    
-                    # Обновляем статистику, только если перевод не был прерван
-                    if not self.translation_interrupted:
-                        print(f"\nУспешно переведено {translated_count} строк.")
-                        stats = self.get_translation_stats(po)
-                        self.print_stats(stats)
-                    
-                except ValueError:
-                    print("Некорректный ввод!")
-                    
-            elif choice == '4':
-                self.view_and_edit_unsaved(po)
-                
-            elif choice == '5':
-                if self.save_po_file(po, file_path):  # Сохраняем в исходный файл
-                    print("Изменения успешно сохранены!")
-                    
-            elif choice == '6':
-                if self.has_unsaved_changes(po):
-                    save_choice = input("\nЕсть несохраненные изменения. Сохранить перед выходом? (y/N): ").strip().lower()
-                    if save_choice == 'y':
-                        self.save_po_file(po, file_path)
-                print("Завершение работы с файлом.")
-                break # Выходим из цикла работы с файлом
-                
-            else:
+            action = self._menu_actions.get(choice)
+            if action is None:
                 print("Некорректный выбор. Пожалуйста, введите число от 1 до 6.")
+                continue
+            if action(po, file_path) is _EXIT_MENU:
+                break # Выходим из цикла работы с файлом
         return True # Возвращаемся в главное меню для выбора другого файла
 
+    @staticmethod
+    def _validate_po_path(file_path):
+        """Проверяем одним вызовом stat, что путь указывает на обычный файл с расширением .po
+        
+        Returns:
+            Path или None, если файл не подходит
+        """
+        path = Path(file_path)
+        if path.suffix.lower() != '.po':
+            return None
+        try:
+            st = path.stat()
+        except OSError:
+            return None
+        return path if stat.S_ISREG(st.st_mode) else None
+
     def get_po_file_path(self):
         """Получаем путь к PO файлу из переменных окружения или запрашиваем у пользователя"""
         file_path = os.getenv('PO_FILE_PATH', '').strip()
         
-        if file_path and os.path.isfile(file_path):
+        if file_path and self._validate_po_path(file_path):
             return file_path
             
         if file_path:
@@ -488,7 +780,7 @@ class TranslationManager:
                 print('PO_FILE_PATH="путь_к_вашему_файлу.po"')
                 input("\nНажмите Enter после сохранения изменений...")
                 file_path = os.getenv('PO_FILE_PATH', '').strip()
-                if file_path and os.path.isfile(file_path):
+                if file_path and self._validate_po_path(file_path):
                     return file_path
                 print("Файл по-прежнему не найден. Проверьте путь и повторите попытку.")
             elif choice == '3':
@@ -502,6 +794,23 @@ class TranslationManager:
         """Основной метод запуска приложения"""
         print("\n=== Инструмент для перевода PO файлов ===")
         
+        # PO_FILE_PATH может быть шаблоном (например, locales/*/LC_MESSAGES/*.po)
+        pattern = os.getenv('PO_FILE_PATH', '').strip()
+        if glob.has_magic(pattern):
+            # Резервные копии *_original.po лежат рядом с исходными файлами, их пропускаем
+            file_paths = sorted(p for p in glob.glob(pattern, recursive=True)
+                                if not p.endswith('_original.po') and self._validate_po_path(p))
+            if len(file_paths) > 1:
+                self.process_files(file_paths)
+                print("\nРабота завершена.")
+                return
+            if file_paths:
+                # Интерактивное меню имеет смысл только для одного файла
+                self.process_file(file_paths[0])
+                print("\nРабота завершена.")
+                return
+            print(f"\nПо шаблону {pattern} не найдено ни одного PO файла")
+        
         while True:
             file_path = self.get_po_file_path()
             
@@ -512,12 +821,11 @@ class TranslationManager:
                     print("Выход из программы.")
                     return
 
-            if not os.path.isfile(file_path):
-                print(f"\nОшибка: Файл не найден: {file_path}")
-                continue
-                
-            if not file_path.lower().endswith('.po'):
-                print("\nОшибка: Файл должен иметь расширение .po")
+            if not self._validate_po_path(file_path):
+                if file_path.lower().endswith('.po'):
+                    print(f"\nОшибка: Файл не найден: {file_path}")
+                else:
+                    print("\nОшибка: Файл должен иметь расширение .po")
                 continue
             
             self.process_file(file_path)
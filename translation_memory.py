@@ -0,0 +1,77 @@
+import hashlib
+import json
+import logging
+import sqlite3
+from typing import Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class TranslationMemory:
+    """Персистентная память переводов на базе SQLite.
+
+    Ключ записи - SHA-256 от пространства имен (модель и версия промпта),
+    целевого языка и исходной строки (с формой множественного числа), значение -
+    результат перевода в том же формате, что возвращает GeminiTranslator.translate_batch.
+    Смена модели или промпта дает новые ключи, и старые переводы не подмешиваются.
+    """
+
+    # Максимум параметров в одном запросе SELECT ... IN (...) (лимит SQLite - 999)
+    LOOKUP_CHUNK_SIZE = 500
+
+    def __init__(self, db_path: str = 'tm.sqlite', target_lang: str = 'ru', namespace: str = ''):
+        self.db_path = db_path
+        self.target_lang = target_lang
+        self.namespace = namespace
+        self._conn = sqlite3.connect(db_path)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('CREATE TABLE IF NOT EXISTS tm (hash BLOB PRIMARY KEY, msgstr TEXT)')
+        self._conn.commit()
+        # Кэш в памяти процесса перед SQLite: повторные запросы не доходят до базы
+        self._cache = {}
+        logger.info(f"Память переводов открыта: {db_path}")
+
+    def make_key(self, msgid: str, msgid_plural: str = '') -> bytes:
+        """Вычисляет ключ записи для исходной строки"""
+        source = f"{self.namespace}|{self.target_lang}|{msgid}\x00{msgid_plural or ''}"
+        return hashlib.sha256(source.encode('utf-8')).digest()
+
+    def get(self, key: bytes) -> Optional[Dict]:
+        """Возвращает сохраненный перевод или None"""
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: Iterable[bytes]) -> Dict[bytes, Dict]:
+        """Возвращает найденные переводы для набора ключей, обращаясь к базе пачками"""
+        found = {}
+        missing = []
+        for key in keys:
+            if key in self._cache:
+                found[key] = self._cache[key]
+            else:
+                missing.append(key)
+
+        for start in range(0, len(missing), self.LOOKUP_CHUNK_SIZE):
+            chunk = missing[start:start + self.LOOKUP_CHUNK_SIZE]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self._conn.execute(f'SELECT hash, msgstr FROM tm WHERE hash IN ({placeholders})', chunk)
+            for key, value in rows:
+                try:
+                    translation = json.loads(value)
+                except json.JSONDecodeError:
+                    logger.warning("Поврежденная запись в памяти переводов: %s", value[:200])
+                    continue
+                self._cache[key] = found[key] = translation
+        return found
+
+    def put_many(self, items: Iterable[Tuple[bytes, Dict]]):
+        """Сохраняет пачку переводов одной транзакцией"""
+        items = list(items)
+        if not items:
+            return
+        rows = [(key, json.dumps(translation, ensure_ascii=False)) for key, translation in items]
+        self._cache.update(items)
+        with self._conn:
+            self._conn.executemany('INSERT OR REPLACE INTO tm (hash, msgstr) VALUES (?, ?)', rows)
+
+    def close(self):
+        """Закрывает соединение с базой"""
+        self._conn.close()
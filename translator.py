@@ -1,42 +1,88 @@
 import os
+import asyncio
+import itertools
 import google.generativeai as genai
 import logging
 import json
+import random
+import re
+import threading
 import time
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
+from google.ai import generativelanguage as glm
+from google.api_core.exceptions import GoogleAPICallError, ResourceExhausted
+from google.rpc import error_details_pb2
+from translation_memory import TranslationMemory
+from utils.json_stream import JSONArrayStream
+from utils.circuit_breaker import CircuitBreaker
+from utils.rate_limiter import TokenBucket
 
 logger = logging.getLogger(__name__)
 
-class GeminiTranslator:
-    def __init__(self):
-        """Инициализация переводчика с использованием Gemini API"""
-        api_key = os.getenv('GOOGLE_API_KEY')
-        if not api_key:
-            raise ValueError("GOOGLE_API_KEY не найден в переменных окружения")
-            
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.0-flash') 
-        self.max_retries = 3
-        self.retry_delay = 5  # секунды
-        self.BATCH_SIZE = 10  
+# Плейсхолдеры форматирования: %s, %(name)s, {var}, $var
+PLACEHOLDER_RE = re.compile(r'%(?:\([^)]*\))?[-#0 +]*\d*(?:\.\d+)?[diouxXeEfFgGcrsa%]|\{[^{}]*\}|\$\w+')
+# Ссылки и адреса электронной почты не переводятся
+URL_RE = re.compile(r'\b(?:https?|ftp)://\S+|\bwww\.\S+|[\w.+-]+@[\w-]+(?:\.[\w-]+)+')
+# Строка не нуждается в переводе, если после удаления плейсхолдеров и адресов в ней не осталось букв
+# (например, "%s", "{0}", "{count}:", "1.5", "https://getindico.io") - такие строки копируются как есть
+LETTER_RE = re.compile(r'[^\W\d_]')
 
-    def _create_batch_prompt(self, entries: List[Dict[str, Any]]) -> str:
-        """Создает промпт для пакетного перевода с инструкцией вывода в JSON."""
-        prompt = """
-You are a professional software translator from English to Russian for an open-source event management tool called Indico.
+def needs_translation(text: str) -> bool:
+    """Проверяет, есть ли в строке что переводить помимо плейсхолдеров, адресов и знаков"""
+    return LETTER_RE.search(PLACEHOLDER_RE.sub('', URL_RE.sub('', text))) is not None
 
-Translate the following list of texts. Follow these rules STRICTLY:
+def passthrough_translation(msgid: str, msgid_plural: str = '') -> Dict[str, Any]:
+    """Результат перевода, совпадающий с исходной строкой"""
+    if msgid_plural:
+        return {'type': 'plural', 'forms': {'one': msgid, 'few': msgid_plural, 'many': msgid_plural, 'other': msgid_plural}}
+    return {'type': 'simple', 'text': msgid}
+
+# Запасной разбор задержки из текста ошибки, если структурированных данных нет
+_RETRY_DELAY_RE = re.compile(r'retry_delay\s*\{\s*seconds:\s*(\d+)')
+
+# Версия промпта и схемы ответа: входит в ключ памяти переводов, поэтому после
+# изменения инструкций модели переводы, полученные со старым промптом, не используются
+PROMPT_VERSION = 'v1'
+
+# Схема ответа пакетного перевода: Gemini генерирует JSON строго этой формы.
+# Объединений типов схема не поддерживает, поэтому простой перевод лежит в "translation",
+# а формы множественного числа - в "forms"; неиспользуемое поле равно null
+PLURAL_FORMS = ("one", "few", "many", "other")
+BATCH_RESPONSE_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "id": {"type": "integer"},
+            "type": {"type": "string", "format": "enum", "enum": ["simple", "plural"]},
+            "translation": {"type": "string", "nullable": True},
+            "forms": {
+                "type": "object",
+                "nullable": True,
+                "properties": {form: {"type": "string"} for form in PLURAL_FORMS},
+                "required": list(PLURAL_FORMS),
+            },
+        },
+        "required": ["id", "type"],
+    },
+}
+
+# Постоянная часть инструкций: передается модели как system_instruction один раз,
+# а в каждом запросе отправляется только JSON со строками пакета
+SYSTEM_PROMPT = """You are a professional software translator from English to Russian for an open-source event management tool called Indico.
+
+Each user message is a JSON list of texts to translate. Follow these rules STRICTLY:
 1.  Preserve technical terms and placeholders like `%s`, `{var}`, `$var`, `%(name)s`.
 2.  Maintain the original case and formatting where appropriate for the context.
 3.  Your entire response MUST be a valid JSON array `[...]` containing one JSON object for each input text, in the same order. Do not output anything before or after the JSON array.
 
-For each text, generate a JSON object with a "type" field and a "translation" field.
+For each text, generate a JSON object with the same "id" and "type" fields.
 
-- If the text is a simple string, the JSON object should be:
-  {"type": "simple", "translation": "your_russian_translation"}
+- If the text is a simple string, put the translation into the "translation" field:
+  {"id": 1, "type": "simple", "translation": "your_russian_translation", "forms": null}
 
-- If the text has plural forms (marked with [PLURAL]), the JSON object must include all four Russian plural forms:
-  {"type": "plural", "translation": {"one": "форма для 1", "few": "форма для 2-4", "many": "форма для 5+", "other": "общая форма"}}
+- If the text has plural forms, put all four Russian plural forms into the "forms" field:
+  {"id": 2, "type": "plural", "translation": null, "forms": {"one": "форма для 1", "few": "форма для 2-4", "many": "форма для 5+", "other": "общая форма"}}
 
 Example Input:
 [
@@ -46,17 +92,146 @@ Example Input:
 
 Example Output for the above input:
 [
-  {"id": 1, "type": "simple", "translation": "Загрузить BoA"},
-  {"id": 2, "type": "plural", "translation": {"one": "один файл", "few": "%(num)d файла", "many": "%(num)d файлов", "other": "%(num)d файл(ов)"}}
+  {"id": 1, "type": "simple", "translation": "Загрузить BoA", "forms": null},
+  {"id": 2, "type": "plural", "translation": null, "forms": {"one": "один файл", "few": "%(num)d файла", "many": "%(num)d файлов", "other": "%(num)d файл(ов)"}}
 ]
-
-Now, translate the following texts:
 """
-        
+
+MODEL_NAME = 'gemini-2.0-flash'
+
+class ResponseDesyncError(ValueError):
+    """Потоковый ответ API разошелся с пакетом запроса (лишние, пропущенные или переставленные элементы)"""
+
+# Настройка genai и объекты моделей общие для всех переводчиков процесса:
+# повторное создание GeminiTranslator не перенастраивает клиент и не пересоздает модель
+_CONFIG_LOCK = threading.Lock()
+_configured_api_key = None
+_MODEL_CACHE: Dict[Tuple[str, str], genai.GenerativeModel] = {}
+# Лимиты запросов (GEMINI_RPM) и входных токенов (GEMINI_TPM) в минуту, свои для каждого ключа;
+# 0 отключает соответствующий лимит
+_RATE_LIMITERS: Dict[str, Tuple[Optional[TokenBucket], Optional[TokenBucket]]] = {}
+
+def _get_model(api_key: str, model_name: str = MODEL_NAME) -> genai.GenerativeModel:
+    """Возвращает общую для ключа модель. Первый ключ настраивает genai и использует
+    клиенты по умолчанию, остальные ключи пула получают собственный клиент."""
+    global _configured_api_key
+    with _CONFIG_LOCK:
+        if _configured_api_key is None:
+            genai.configure(api_key=api_key)
+            _configured_api_key = api_key
+        model = _MODEL_CACHE.get((model_name, api_key))
+        if model is None:
+            model = genai.GenerativeModel(model_name, system_instruction=SYSTEM_PROMPT)
+            if api_key != _configured_api_key:
+                model._client = glm.GenerativeServiceClient(client_options={'api_key': api_key})
+            _MODEL_CACHE[(model_name, api_key)] = model
+        return model
+
+def _get_rate_limiters(api_key: str) -> Tuple[Optional[TokenBucket], Optional[TokenBucket]]:
+    """Возвращает общие для ключа ограничители (запросы в минуту, токены в минуту)"""
+    with _CONFIG_LOCK:
+        limiters = _RATE_LIMITERS.get(api_key)
+        if limiters is None:
+            rpm = int(os.getenv('GEMINI_RPM', '60'))
+            tpm = int(os.getenv('GEMINI_TPM', '1000000'))
+            limiters = _RATE_LIMITERS[api_key] = (
+                TokenBucket(rpm) if rpm > 0 else None,
+                TokenBucket(tpm) if tpm > 0 else None,
+            )
+        return limiters
+
+# Единственный цикл событий процесса для синхронных вызовов асинхронного кода.
+# Асинхронные клиенты Gemini (клиент genai по умолчанию и клиенты ключей пула) общие
+# для процесса и привязываются к циклу первого запроса, поэтому второй цикл их сломал бы
+_LOOP: Optional[asyncio.AbstractEventLoop] = None
+
+def run_async(coro):
+    """Выполняет корутину в общем цикле событий процесса и возвращает ее результат.
+    При KeyboardInterrupt незавершенная работа отменяется, чтобы цикл можно было использовать снова."""
+    global _LOOP
+    if _LOOP is None:
+        _LOOP = asyncio.new_event_loop()
+    task = _LOOP.create_task(coro)
+    try:
+        return _LOOP.run_until_complete(task)
+    except KeyboardInterrupt:
+        task.cancel()
+        _LOOP.run_until_complete(asyncio.gather(task, return_exceptions=True))
+        raise
+
+# Общий для процесса предохранитель: после 5 пакетов подряд, не получивших ни одного перевода,
+# запросы к API не отправляются 30 секунд, а затем проверяются одним пробным пакетом
+_BREAKER = CircuitBreaker(failure_threshold=5, cooldown=30.0)
+
+class _ApiKeySlot:
+    """Ключ API из пула: своя модель (клиент), свои лимиты и время охлаждения после ответа 429"""
+
+    def __init__(self, api_key: str):
+        self.api_key = api_key
+        self.model = _get_model(api_key)
+        self.requests_limiter, self.tokens_limiter = _get_rate_limiters(api_key)
+        self.cooldown_until = 0.0
+
+    def async_model(self) -> genai.GenerativeModel:
+        """Модель для асинхронных запросов. Асинхронный клиент ключа создается внутри
+        работающего цикла событий, к которому он будет привязан."""
+        if self.api_key != _configured_api_key and self.model._async_client is None:
+            self.model._async_client = glm.GenerativeServiceAsyncClient(client_options={'api_key': self.api_key})
+        return self.model
+
+class GeminiTranslator:
+    def __init__(self, translation_memory: Optional[TranslationMemory] = None):
+        """Инициализация переводчика с использованием Gemini API"""
+        # Несколько ключей (GOOGLE_API_KEYS через запятую) используются по очереди:
+        # у каждого ключа своя квота, и ключ, получивший 429, временно пропускается
+        api_keys = [key.strip() for key in os.getenv('GOOGLE_API_KEYS', os.getenv('GOOGLE_API_KEY', '')).split(',')]
+        api_keys = list(dict.fromkeys(key for key in api_keys if key))
+        if not api_keys:
+            raise ValueError("GOOGLE_API_KEY не найден в переменных окружения")
+            
+        self._keys = [_ApiKeySlot(api_key) for api_key in api_keys]
+        self._key_cycle = itertools.cycle(self._keys)
+        self._keys_lock = threading.Lock()
+        self.model = self._keys[0].model
+        self.max_retries = 3
+        self.retry_delay = 5  # секунды
+        self.max_retry_delay = 60  # верхняя граница экспоненциальной паузы, секунды
+        # Пакет закрывается при достижении любого из лимитов: числа строк корзины,
+        # BATCH_MAX_TOKENS токенов исходного текста или BATCH_MAX_OUTPUT_TOKENS токенов ожидаемого перевода
+        self.BATCH_MAX_TOKENS = 1000
+        self.BATCH_MAX_OUTPUT_TOKENS = 2000
+        # Корзины по длине msgid: (макс. длина в символах, строк в пакете, одновременных запросов, таймаут в секундах).
+        # Короткие строки идут крупными пакетами и с высоким параллелизмом, длинные - мелкими и с большим таймаутом
+        self.LENGTH_BUCKETS = (
+            (64, 20, 8, 60),
+            (256, 10, 4, 90),
+            (1024, 5, 2, 180),
+            (None, 2, 2, 300),
+        )
+        # Верхняя граница max_output_tokens для gemini-2.0-flash
+        self.MAX_OUTPUT_TOKENS = 8192
+        # Общее число одновременных запросов к API поверх лимитов корзин; больше - быстрее, но ближе к лимитам Gemini
+        self.max_concurrent = max(1, int(os.getenv('GEMINI_MAX_CONCURRENT', '4')))
+        self.generation_config = {
+            "response_mime_type": "application/json",
+            "response_schema": BATCH_RESPONSE_SCHEMA,
+        }
+        # Детерминированный режим (по умолчанию): жадное декодирование дает один и тот же
+        # перевод для одной и той же строки, что согласуется с памятью переводов.
+        # GEMINI_DETERMINISTIC=0 возвращает параметры сэмплирования модели по умолчанию
+        if os.getenv('GEMINI_DETERMINISTIC', '1') != '0':
+            self.generation_config.update({"temperature": 0, "top_p": 1.0, "top_k": 1})
+        # Память переводов: пакеты сначала сверяются с ней, в API уходят только промахи
+        self.memory = translation_memory or TranslationMemory(
+            os.getenv('TM_FILE_PATH', 'tm.sqlite'), namespace=f"{self.model.model_name}|{PROMPT_VERSION}")
+
+    def _create_batch_prompt(self, entries: List[Dict[str, Any]]) -> str:
+        """Создает промпт для пакетного перевода: JSON список строк пакета.
+        Инструкции по формату ответа заданы в SYSTEM_PROMPT."""
         # Подготавливаем входные данные в формате JSON для промпта
         input_data = []
         for i, entry in enumerate(entries):
-            if isinstance(entry, dict) and 'msgid_plural' in entry:
+            if self._is_plural(entry):
                 input_data.append({
                     "id": i,
                     "type": "plural",
@@ -73,63 +248,408 @@ Now, translate the following texts:
                     "text": text
                 })
 
-        prompt += json.dumps(input_data, indent=2, ensure_ascii=False)
-        return prompt
+        return json.dumps(input_data, indent=2, ensure_ascii=False)
+
+    def _parse_batch_items(self, response_items: list, count: int) -> Optional[List[Optional[Dict]]]:
+        """Разбирает элементы JSON ответа API. Возвращает None, если ответ не соответствует пакету.
+
+        Форму элементов гарантирует BATCH_RESPONSE_SCHEMA, проверить остается только
+        число элементов и заполненность нужного поля."""
+        if len(response_items) != count:
+            logger.warning("Ответ API не соответствует ожидаемому формату. Получено %d/%d записей.", len(response_items), count)
+            return None
+
+        results = []
+        for res_item in response_items:
+            res_type = res_item['type']
+            if res_type == 'simple' and res_item.get('translation') is not None:
+                results.append({'type': 'simple', 'text': res_item['translation']})
+            elif res_type == 'plural' and res_item.get('forms'):
+                results.append({'type': 'plural', 'forms': res_item['forms']})
+            else:
+                logger.warning("Некорректный элемент в ответе JSON: %s", res_item)
+                results.append(None)
+
+        logger.info("Успешно переведено и обработано %d строк.", len(results))
+        return results
+
+    @staticmethod
+    def _is_plural(entry) -> bool:
+        """Элемент пакета с формами множественного числа"""
+        return isinstance(entry, dict) and 'msgid_plural' in entry
+
+    def _feed_stream(self, stream: JSONArrayStream, chunk, items: list, entries: list):
+        """Разбирает очередную часть потокового ответа и сверяет новые элементы с пакетом.
+        Рассинхронизация обнаруживается на первом же неверном элементе, а не после всего ответа."""
+        start = len(items)
+        items.extend(stream.feed(self._chunk_text(chunk)))
+        if len(items) > len(entries):
+            raise ResponseDesyncError(f"Лишние элементы в ответе API: {len(items)}/{len(entries)}")
+        for i in range(start, len(items)):
+            item = items[i]
+            expected_type = 'plural' if self._is_plural(entries[i]) else 'simple'
+            if item.get('id') != i or item.get('type') != expected_type:
+                raise ResponseDesyncError(f"Элемент {i} ответа API не соответствует пакету: {item}")
+
+    @staticmethod
+    def _abort_stream(response):
+        """Прекращает получение потокового ответа, чтобы модель не генерировала ненужные токены"""
+        iterator = getattr(response, '_iterator', None)
+        cancel = getattr(iterator, 'cancel', None)
+        if cancel is not None:
+            cancel()
+        response._done = True
+
+    @staticmethod
+    async def _abort_stream_async(response):
+        """Асинхронный вариант _abort_stream: закрывает поток; gRPC вызов отменяется вместе с ним"""
+        iterator = getattr(response, '_iterator', None)
+        if hasattr(iterator, 'cancel'):
+            iterator.cancel()
+        elif hasattr(iterator, 'aclose'):
+            await iterator.aclose()
+
+    @staticmethod
+    def _chunk_text(chunk) -> str:
+        """Текст очередной части потокового ответа (служебные части без текста пропускаются)"""
+        try:
+            return chunk.text
+        except ValueError:
+            return ''
+
+    @staticmethod
+    def estimate_tokens(msgid: str, msgid_plural: str = '') -> int:
+        """Грубая оценка числа токенов строки (~4 символа на токен).
+        Для множественного числа модель возвращает 4 формы, поэтому msgid_plural считается дважды."""
+        return (len(msgid) + 2 * len(msgid_plural or '')) // 4 + 1
+
+    @staticmethod
+    def estimate_output_tokens(msgid: str, msgid_plural: str = '') -> int:
+        """Грубая оценка числа токенов перевода: русский текст примерно в полтора раза длиннее
+        в токенах, а для множественного числа модель пишет четыре формы."""
+        chars = len(msgid) + 3 * len(msgid_plural) if msgid_plural else len(msgid)
+        return chars * 3 // 8 + 1
+
+    def pack_batches(self, entries: Iterable, max_items: Optional[int] = None) -> Iterator[list]:
+        """Набирает элементы в пакеты, пока не достигнут лимит строк, входных или выходных токенов.
+        Элементы - строки, словари с msgid/msgid_plural или кортежи (msgid, msgid_plural)."""
+        if max_items is None:
+            max_items = self.LENGTH_BUCKETS[0][1]
+        buf, in_tokens, out_tokens = [], 0, 0
+        for entry in entries:
+            msgid, msgid_plural = self._source(entry)
+            entry_in = self.estimate_tokens(msgid, msgid_plural)
+            entry_out = self.estimate_output_tokens(msgid, msgid_plural)
+            # Элемент, не влезающий в пакет, начинает новый; слишком большой элемент идет один
+            if buf and (in_tokens + entry_in > self.BATCH_MAX_TOKENS
+                        or out_tokens + entry_out > self.BATCH_MAX_OUTPUT_TOKENS):
+                yield buf
+                buf, in_tokens, out_tokens = [], 0, 0
+            buf.append(entry)
+            in_tokens += entry_in
+            out_tokens += entry_out
+            if len(buf) >= max_items:
+                yield buf
+                buf, in_tokens, out_tokens = [], 0, 0
+        if buf:
+            yield buf
+
+    def translate_all(self, entries: Iterable) -> Iterator[Optional[Dict]]:
+        """Переводит произвольное число строк, разбивая их на пакеты по бюджету токенов.
+        Результаты отдаются по одному в порядке входных строк."""
+        for batch in self.pack_batches(entries):
+            yield from self.translate_batch(batch)
+
+    def bucket_for(self, msgid: str) -> int:
+        """Индекс корзины LENGTH_BUCKETS, в которую попадает строка"""
+        length = len(msgid)
+        for index, (max_length, _, _, _) in enumerate(self.LENGTH_BUCKETS):
+            if max_length is None or length <= max_length:
+                return index
+        return len(self.LENGTH_BUCKETS) - 1
+
+    def _generation_config_for(self, entries: list) -> Dict[str, Any]:
+        """Настройки генерации с лимитом вывода, рассчитанным по размеру пакета"""
+        source_tokens = sum(self.estimate_tokens(*self._source(entry)) for entry in entries)
+        # Перевод с JSON-разметкой занимает примерно вдвое больше токенов, чем исходный текст
+        max_output_tokens = max(2048, min(self.MAX_OUTPUT_TOKENS, 2 * source_tokens + 1024))
+        return {**self.generation_config, "max_output_tokens": max_output_tokens}
+
+    @staticmethod
+    def _source(entry) -> Tuple[str, str]:
+        """Исходный текст элемента пакета (строки, словаря с msgid_plural или кортежа (msgid, msgid_plural))"""
+        if isinstance(entry, dict):
+            return entry['msgid'], entry.get('msgid_plural', '')
+        if isinstance(entry, tuple):
+            return entry[0], entry[1] or ''
+        return entry, ''
+
+    def _lookup_memory(self, entries: list) -> Tuple[List[Optional[Dict]], Dict[bytes, List[int]]]:
+        """Заполняет результаты для строк без текста и из памяти переводов, группирует промахи
+        по исходному тексту. Повторы одной строки внутри пакета отправляются в API один раз."""
+        results = [None] * len(entries)
+        keys = {}
+        for i, entry in enumerate(entries):
+            msgid, msgid_plural = self._source(entry)
+            if needs_translation(msgid):
+                keys[i] = self.memory.make_key(msgid, msgid_plural)
+            else:
+                # Плейсхолдеры, числа, ссылки: возвращаем как есть без запроса к API
+                results[i] = passthrough_translation(msgid, msgid_plural)
+
+        found = self.memory.get_many(set(keys.values()))
+        misses = {}
+        for i, key in keys.items():
+            result = found.get(key)
+            if result is None:
+                misses.setdefault(key, []).append(i)
+            else:
+                results[i] = result
+        if logger.isEnabledFor(logging.DEBUG):
+            # Подсчет нужен только для сообщения, при уровне INFO его не делаем
+            missed = sum(len(indices) for indices in misses.values())
+            if missed < len(entries) or len(misses) < missed:
+                logger.debug("Память переводов: %d без запроса к API, %d промахов (%d уникальных).",
+                             len(entries) - missed, missed, len(misses))
+        return results, misses
+
+    @staticmethod
+    def _unique_misses(entries: list, misses: Dict[bytes, List[int]]) -> list:
+        """Элементы пакета для API: по одному на каждую уникальную строку"""
+        return [entries[indices[0]] for indices in misses.values()]
+
+    def _merge_translated(self, results: List[Optional[Dict]], misses: Dict[bytes, List[int]],
+                          translated: List[Optional[Dict]]) -> List[Optional[Dict]]:
+        """Раздает ответ API всем записям с той же строкой и запоминает удачные переводы"""
+        to_remember = []
+        for (key, indices), translation in zip(misses.items(), translated):
+            for i in indices:
+                results[i] = translation
+            if translation is not None:
+                to_remember.append((key, translation))
+        self.memory.put_many(to_remember)
+        return results
 
     def translate_batch(self, entries: list) -> List[Optional[Dict]]:
-        """Переводит пакет строк, ожидая ответ в формате JSON."""
+        """Переводит пакет строк, обращаясь к API только за строками, которых нет в памяти переводов."""
         if not entries:
             return []
-            
+        results, misses = self._lookup_memory(entries)
+        if not misses:
+            return results
+        to_send = self._unique_misses(entries, misses)
+        if not _BREAKER.allow():
+            # API недоступен: не тратим время на запросы и паузы между повторами
+            return self._merge_translated(results, misses, [None] * len(to_send))
+        try:
+            translated = self._request_batch(to_send)
+        except BaseException:
+            # Прерывание (Esc, Ctrl+C) ничего не говорит о доступности API: только освобождаем пробный вызов
+            _BREAKER.release()
+            raise
+        _BREAKER.record(any(translation is not None for translation in translated))
+        return self._merge_translated(results, misses, translated)
+
+    async def translate_batch_async(self, entries: list, timeout: Optional[float] = None) -> List[Optional[Dict]]:
+        """Асинхронный вариант translate_batch для параллельной отправки пакетов.
+        timeout - ограничение времени одного запроса к API в секундах."""
+        if not entries:
+            return []
+        results, misses = self._lookup_memory(entries)
+        if not misses:
+            return results
+        to_send = self._unique_misses(entries, misses)
+        if not _BREAKER.allow():
+            return self._merge_translated(results, misses, [None] * len(to_send))
+        try:
+            translated = await self._request_batch_async(to_send, timeout)
+        except BaseException:
+            # В том числе CancelledError, когда перевод прерывают и задачи отменяются
+            _BREAKER.release()
+            raise
+        _BREAKER.record(any(translation is not None for translation in translated))
+        return self._merge_translated(results, misses, translated)
+
+    @staticmethod
+    def _server_retry_delay(error: Exception) -> Optional[float]:
+        """Задержка перед повтором, указанная сервером (RetryInfo, заголовок Retry-After), или None"""
+        if isinstance(error, GoogleAPICallError):
+            for detail in error.details:
+                if isinstance(detail, error_details_pb2.RetryInfo):
+                    delay = detail.retry_delay
+                    return delay.seconds + delay.nanos / 1e9
+            # Заголовки есть только у ответов REST: при gRPC (по умолчанию) response - объект вызова без них
+            headers = getattr(error.response, 'headers', None)
+            retry_after = headers.get('Retry-After') if headers is not None else None
+            if retry_after and retry_after.isdigit():
+                return float(retry_after)
+        match = _RETRY_DELAY_RE.search(str(error))
+        return float(match.group(1)) if match else None
+
+    def _retry_delay_for(self, attempt: int, error: Optional[Exception] = None) -> float:
+        """Пауза перед повторной попыткой: заданная сервером или экспоненциальная со случайным разбросом.
+        Разброс не дает параллельным запросам повторяться одновременно и снова упираться в лимит."""
+        if error is not None:
+            server_delay = self._server_retry_delay(error)
+            if server_delay is not None:
+                # Значение сервера соблюдаем, разнося запросы в пределах ±20%
+                return server_delay * random.uniform(0.8, 1.2)
+        # "Full jitter": равномерно от нуля до экспоненциальной границы
+        return random.uniform(0, min(self.max_retry_delay, self.retry_delay * (2 ** attempt)))
+
+    def _acquire_key(self, prompt: str) -> Tuple[_ApiKeySlot, float]:
+        """Выбирает следующий ключ пула, не находящийся на охлаждении, и резервирует запрос
+        в его лимитах. Возвращает ключ и паузу перед отправкой: пауза заранее удерживает
+        нагрузку в пределах квоты вместо повторов после ответа 429."""
+        with self._keys_lock:
+            now = time.monotonic()
+            for _ in range(len(self._keys)):
+                slot = next(self._key_cycle)
+                if slot.cooldown_until <= now:
+                    break
+            else:
+                # Все ключи охлаждаются - ждем тот, что освободится первым
+                slot = min(self._keys, key=lambda key_slot: key_slot.cooldown_until)
+            wait = max(0.0, slot.cooldown_until - now)
+
+        if slot.requests_limiter is not None:
+            wait = max(wait, slot.requests_limiter.reserve(1))
+        if slot.tokens_limiter is not None:
+            wait = max(wait, slot.tokens_limiter.reserve((len(SYSTEM_PROMPT) + len(prompt)) // 4))
+        if wait:
+            logger.debug("Ожидание лимита запросов API: %.1f с", wait)
+        return slot, wait
+
+    def _cool_down(self, slot: _ApiKeySlot, delay: float):
+        """Выводит ключ из ротации на delay секунд после ответа 429"""
+        with self._keys_lock:
+            slot.cooldown_until = max(slot.cooldown_until, time.monotonic() + delay)
+        if len(self._keys) > 1:
+            logger.warning("Ключ API ...%s исчерпал квоту, пауза %.1f с", slot.api_key[-4:], delay)
+
+    async def translate_many_async(self, batches: List[list], concurrency: Optional[int] = None) -> List[Any]:
+        """Переводит несколько пакетов параллельно, не более concurrency запросов одновременно.
+
+        Возвращает результаты в порядке пакетов; для пакета, завершившегося исключением,
+        на его месте стоит само исключение."""
+        semaphore = asyncio.Semaphore(concurrency or self.max_concurrent)
+
+        async def translate_one(entries):
+            async with semaphore:
+                return await self.translate_batch_async(entries)
+
+        return await asyncio.gather(*(translate_one(entries) for entries in batches), return_exceptions=True)
+
+    def translate_many(self, batches: List[list], concurrency: Optional[int] = None) -> List[Any]:
+        """Синхронная обертка над translate_many_async. Выполняется в общем цикле событий процесса
+        (run_async), том же, что использует TranslationManager: асинхронный клиент Gemini привязан к нему."""
+        return run_async(self.translate_many_async(batches, concurrency))
+
+    def _finish_stream(self, stream: JSONArrayStream, items: list, entries: list) -> Optional[List[Optional[Dict]]]:
+        """Проверяет, что потоковый ответ завершен, и разбирает его; None - ответ не соответствует пакету"""
+        stream.close()
+        return self._parse_batch_items(items, len(entries))
+
+    def _retry_after(self, attempt: int, slot: _ApiKeySlot, error: Optional[Exception] = None) -> Optional[float]:
+        """Логирует неудачную попытку и решает, что делать дальше.
+
+        Возвращает паузу перед следующей попыткой или None, если попытки исчерпаны.
+        error=None означает, что ответ получен, но не соответствует пакету."""
+        if isinstance(error, ResponseDesyncError):
+            logger.warning("%s. Получение ответа прервано.", error)
+        elif isinstance(error, json.JSONDecodeError):
+            logger.error("Ошибка декодирования JSON ответа API: %s\nОтвет: %s", error, error.doc[:500])
+        elif isinstance(error, ResourceExhausted):
+            logger.error("Превышена квота API (попытка %d/%d): %s", attempt + 1, self.max_retries, error)
+            # Паузу выдерживает только этот ключ: повтор сразу уходит через следующий ключ пула
+            self._cool_down(slot, self._retry_delay_for(attempt, error))
+        elif error is not None:
+            logger.error("Ошибка при переводе пакета (попытка %d/%d): %s", attempt + 1, self.max_retries, error)
+
+        if attempt == self.max_retries - 1:
+            return None
+        if isinstance(error, ResourceExhausted):
+            return 0.0
+        if error is None or isinstance(error, (ResponseDesyncError, json.JSONDecodeError)):
+            # Ответ был, но некорректный: указаний сервера о паузе нет
+            return self._retry_delay_for(attempt)
+        return self._retry_delay_for(attempt, error)
+
+    def _request_batch(self, entries: list) -> List[Optional[Dict]]:
+        """Отправляет пакет строк в API, ожидая ответ в формате JSON."""
         prompt = self._create_batch_prompt(entries)
-        logger.debug(f"Отправка запроса на перевод (всего {len(entries)} записей).")
-        
+        generation_config = self._generation_config_for(entries)
+        logger.debug("Отправка запроса на перевод (всего %d записей).", len(entries))
+
         for attempt in range(self.max_retries):
+            response = None
+            slot, wait = self._acquire_key(prompt)
             try:
-                # Используем JSON режим
-                generation_config = {
-                    "response_mime_type": "application/json",
-                }
-                response = self.model.generate_content(prompt, generation_config=generation_config)
-
-                # Парсим JSON ответ
-                response_json = json.loads(response.text)
-                
-                if not isinstance(response_json, list) or len(response_json) != len(entries):
-                    logger.warning(f"Ответ API не соответствует ожидаемому формату. Получено {len(response_json)}/{len(entries)} записей.")
-                    if attempt < self.max_retries - 1:
-                        time.sleep(self.retry_delay * (attempt + 1))
-                        continue
-                    return [None] * len(entries)
-
-                results = []
-                for res_item in response_json:
-                    res_type = res_item.get('type')
-                    translation = res_item.get('translation')
-
-                    if res_type == 'simple' and isinstance(translation, str):
-                        results.append({'type': 'simple', 'text': translation})
-                    elif res_type == 'plural' and isinstance(translation, dict):
-                        results.append({'type': 'plural', 'forms': translation})
-                    else:
-                        logger.warning(f"Некорректный элемент в ответе JSON: {res_item}")
-                        results.append(None)
-                
-                logger.info(f"Успешно переведено и обработано {len(results)} строк.")
-                return results
-
-            except json.JSONDecodeError as e:
-                logger.error(f"Ошибка декодирования JSON ответа API: {e}\nОтвет: {response.text[:500]}")
-                if attempt == self.max_retries - 1:
-                    return [None] * len(entries)
-                time.sleep(self.retry_delay)
+                if wait:
+                    time.sleep(wait)
+                # Ответ читаем потоком: элементы массива разбираются по мере поступления,
+                # без сборки всего текста ответа в одну строку
+                response = slot.model.generate_content(prompt, generation_config=generation_config, stream=True)
+                stream = JSONArrayStream()
+                items = []
+                for chunk in response:
+                    self._feed_stream(stream, chunk, items, entries)
+                results = self._finish_stream(stream, items, entries)
+                if results is not None:
+                    return results
+                delay = self._retry_after(attempt, slot)
+
+            except ResponseDesyncError as e:
+                # Прерываем генерацию: остаток ответа все равно был бы отброшен
+                self._abort_stream(response)
+                delay = self._retry_after(attempt, slot, e)
 
             except Exception as e:
-                logger.error(f"Ошибка при переводе пакета (попытка {attempt + 1}/{self.max_retries}): {e}")
-                if attempt == self.max_retries - 1:
-                    return [None] * len(entries)
-                time.sleep(self.retry_delay * (attempt + 1))
-        
+                delay = self._retry_after(attempt, slot, e)
+
+            if delay is None:
+                break
+            if delay:
+                time.sleep(delay)
+
+        return [None] * len(entries)
+
+    async def _request_batch_async(self, entries: list, timeout: Optional[float] = None) -> List[Optional[Dict]]:
+        """Асинхронно отправляет пакет строк в API."""
+        prompt = self._create_batch_prompt(entries)
+        generation_config = self._generation_config_for(entries)
+        request_options = {'timeout': timeout} if timeout else None
+        logger.debug("Асинхронная отправка запроса на перевод (всего %d записей).", len(entries))
+
+        for attempt in range(self.max_retries):
+            response = None
+            slot, wait = self._acquire_key(prompt)
+            try:
+                if wait:
+                    await asyncio.sleep(wait)
+                response = await slot.async_model().generate_content_async(
+                    prompt, generation_config=generation_config, request_options=request_options, stream=True)
+                stream = JSONArrayStream()
+                items = []
+                async for chunk in response:
+                    self._feed_stream(stream, chunk, items, entries)
+                results = self._finish_stream(stream, items, entries)
+                if results is not None:
+                    return results
+                delay = self._retry_after(attempt, slot)
+
+            except ResponseDesyncError as e:
+                await self._abort_stream_async(response)
+                delay = self._retry_after(attempt, slot, e)
+
+            except Exception as e:
+                delay = self._retry_after(attempt, slot, e)
+
+            if delay is None:
+                break
+            if delay:
+                await asyncio.sleep(delay)
+
         return [None] * len(entries)
 
     def translate(self, text: str) -> Optional[str]:
@@ -0,0 +1,54 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class CircuitBreaker:
+    """
+    Предохранитель для внешнего сервиса
+
+    После failure_threshold неудач подряд (от любых потоков и корутин) предохранитель
+    размыкается: вызовы отклоняются сразу, без запросов и пауз, в течение cooldown секунд.
+    Затем пропускается один пробный вызов: успех замыкает предохранитель, неудача
+    размыкает его снова.
+    """
+
+    def __init__(self, failure_threshold=5, cooldown=30.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._failures = 0
+        self._open_until = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Можно ли выполнять вызов сейчас"""
+        with self._lock:
+            if self._failures < self.failure_threshold:
+                return True
+            if self._probing or time.monotonic() < self._open_until:
+                return False
+            # Время ожидания истекло - пропускаем один пробный вызов
+            self._probing = True
+            return True
+
+    def release(self):
+        """Освобождает пробный вызов, завершившийся без результата (например, отмененный)"""
+        with self._lock:
+            self._probing = False
+
+    def record(self, success):
+        """Учитывает результат разрешенного вызова"""
+        with self._lock:
+            self._probing = False
+            if success:
+                if self._failures >= self.failure_threshold:
+                    logger.info("Сервис снова отвечает, предохранитель замкнут")
+                self._failures = 0
+                return
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                self._open_until = time.monotonic() + self.cooldown
+                logger.warning("%d неудачных вызовов подряд: вызовы отклоняются в течение %.0f с",
+                               self._failures, self.cooldown)
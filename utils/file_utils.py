@@ -0,0 +1,58 @@
+import errno
+import os
+import shutil
+
+# Размер одного вызова os.copy_file_range
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# Ошибки, при которых ядро не умеет copy_file_range для этой пары файлов
+_COPY_FALLBACK_ERRNOS = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EPERM}
+
+def copy_file(src, dst, exclusive=False):
+    """
+    Копирует содержимое файла без метаданных
+    
+    На Linux данные копируются внутри ядра через os.copy_file_range,
+    на остальных системах - через shutil.copyfileobj.
+    
+    Args:
+        src (str): Путь к исходному файлу
+        dst (str): Путь к файлу назначения
+        exclusive (bool): Не перезаписывать существующий файл (FileExistsError)
+    """
+    mode = 'xb' if exclusive else 'wb'
+    with open(src, 'rb') as fsrc, open(dst, mode) as fdst:
+        if hasattr(os, 'copy_file_range'):
+            try:
+                while os.copy_file_range(fsrc.fileno(), fdst.fileno(), COPY_CHUNK_SIZE) > 0:
+                    pass
+                return
+            except OSError as e:
+                if e.errno not in _COPY_FALLBACK_ERRNOS:
+                    raise
+                fsrc.seek(0)
+                fdst.seek(0)
+                fdst.truncate()
+        shutil.copyfileobj(fsrc, fdst)
+
+# Ошибки, при которых жесткую ссылку создать нельзя (другой диск, ФС без ссылок, лимит ссылок)
+_LINK_FALLBACK_ERRNOS = {errno.EXDEV, errno.EPERM, errno.EACCES, errno.EMLINK, errno.ENOTSUP, errno.EOPNOTSUPP}
+
+def link_or_copy(src, dst):
+    """
+    Делает снимок файла жесткой ссылкой, а если это невозможно - копированием
+    
+    Ссылка остается корректным снимком, только пока src не изменяют на месте:
+    новое содержимое должно записываться в другой файл и подменять src через os.replace.
+    Существующий dst не трогается: в этом случае выбрасывается FileExistsError.
+    
+    Args:
+        src (str): Путь к исходному файлу
+        dst (str): Путь к снимку
+    """
+    try:
+        os.link(src, dst)
+    except OSError as e:
+        if e.errno not in _LINK_FALLBACK_ERRNOS:
+            raise
+        copy_file(src, dst, exclusive=True)
@@ -0,0 +1,73 @@
+import json
+from json.decoder import WHITESPACE
+
+class JSONArrayStream:
+    """
+    Инкрементальный разбор JSON массива, приходящего частями
+
+    Каждый полностью полученный элемент верхнего уровня возвращается из feed
+    сразу, не дожидаясь конца массива; разобранная часть текста отбрасывается.
+    Скалярные элементы (числа, строки, литералы) возвращаются, когда после них
+    получен разделитель: иначе число, разрезанное границей частей, разобралось бы неверно.
+    """
+
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._started = False
+        self.finished = False
+
+    def feed(self, text):
+        """
+        Добавляет очередную часть текста
+
+        Returns:
+            list: Элементы массива, завершившиеся в этой части
+
+        Raises:
+            json.JSONDecodeError: Если текст не является JSON массивом
+        """
+        buf = self._buffer + text
+        pos = 0
+        items = []
+        while not self.finished:
+            pos = WHITESPACE.match(buf, pos).end()
+            if pos == len(buf):
+                break
+            char = buf[pos]
+            if not self._started:
+                if char != '[':
+                    raise json.JSONDecodeError("Ожидался JSON массив", buf, pos)
+                self._started = True
+                pos += 1
+            elif char == ']':
+                self.finished = True
+                pos += 1
+            elif char == ',':
+                pos += 1
+            else:
+                try:
+                    item, end = self._decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    # Элемент получен не полностью - ждем следующую часть
+                    break
+                if not isinstance(item, (dict, list)):
+                    # Скаляр считается полученным, только когда за ним виден разделитель:
+                    # число на границе части могло оборваться ("12" из "1234", "1." из "1.5e3")
+                    next_pos = WHITESPACE.match(buf, end).end()
+                    if next_pos == len(buf) or buf[next_pos] not in ',]':
+                        break
+                items.append(item)
+                pos = end
+        self._buffer = buf[pos:]
+        return items
+
+    def close(self):
+        """
+        Проверяет, что массив закрыт
+
+        Raises:
+            json.JSONDecodeError: Если ответ оборвался до закрывающей скобки
+        """
+        if not self.finished:
+            raise json.JSONDecodeError("Неполный JSON массив", self._buffer, 0)
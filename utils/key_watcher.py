@@ -0,0 +1,63 @@
+import os
+import sys
+import threading
+
+try:
+    import msvcrt
+except ImportError:
+    # POSIX: терминал переводится в режим cbreak и опрашивается через select
+    msvcrt = None
+    import select
+    import termios
+    import tty
+
+# Клавиши, прерывающие перевод: Esc и Enter
+INTERRUPT_KEYS = ('\x1b', '\r', '\n')
+# Как часто поток проверяет, не пора ли завершиться (секунды)
+POLL_INTERVAL = 0.1
+
+class KeyWatcher(threading.Thread):
+    """
+    Фоновый поток, отслеживающий нажатие Esc или Enter в консоли
+
+    На Windows клавиши читаются через msvcrt, на остальных системах - из stdin
+    в режиме cbreak. Если stdin не терминал, поток сразу завершается.
+    При нажатии один раз вызывается on_press (из этого потока).
+    """
+
+    def __init__(self, on_press):
+        super().__init__(name='KeyWatcher', daemon=True)
+        self.on_press = on_press
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        """Останавливает поток и дожидается восстановления режима терминала"""
+        self._stop_event.set()
+        if self.is_alive():
+            self.join()
+
+    def run(self):
+        if msvcrt is not None:
+            self._watch_windows()
+        elif sys.stdin is not None and sys.stdin.isatty():
+            self._watch_posix()
+
+    def _watch_windows(self):
+        while not self._stop_event.wait(POLL_INTERVAL):
+            while msvcrt.kbhit():
+                if msvcrt.getwch() in INTERRUPT_KEYS:
+                    self.on_press()
+                    return
+
+    def _watch_posix(self):
+        fd = sys.stdin.fileno()
+        old_attrs = termios.tcgetattr(fd)
+        try:
+            tty.setcbreak(fd)
+            while not self._stop_event.is_set():
+                ready, _, _ = select.select([fd], [], [], POLL_INTERVAL)
+                if ready and os.read(fd, 1).decode('latin-1') in INTERRUPT_KEYS:
+                    self.on_press()
+                    return
+        finally:
+            termios.tcsetattr(fd, termios.TCSADRAIN, old_attrs)
@@ -1,8 +1,13 @@
+import atexit
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
 
+# Фоновый поток, записывающий логи в файл; пересоздается при повторной настройке
+_listener = None
+
 def setup_logger(level_str='INFO', log_file='translation_tool.log'):
     """
     Настройка логирования для приложения
@@ -47,8 +52,19 @@ def setup_logger(level_str='INFO', log_file='translation_tool.log'):
     for handler in root_logger.handlers[:]:
         root_logger.removeHandler(handler)
     
+    # Запись в файл уходит в фоновый поток: вызывающий код (в том числе цикл событий)
+    # только кладет запись в очередь и не ждет блокировки и записи на диск
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+    log_queue = queue.Queue(-1)
+    _listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+    _listener.start()
+    
     # Добавляем наши обработчики
-    root_logger.addHandler(file_handler)
+    root_logger.addHandler(QueueHandler(log_queue))
     root_logger.addHandler(console)
     
     # Настройка логирования для библиотек
@@ -59,3 +75,10 @@ def setup_logger(level_str='INFO', log_file='translation_tool.log'):
     logger.info(f"Логирование инициализировано. Уровень: {level_str}. Файл: {log_path}")
     
     return logger
+
+
+@atexit.register
+def _stop_listener():
+    """Дописываем оставшиеся в очереди записи при завершении процесса"""
+    if _listener is not None:
+        _listener.stop()
@@ -0,0 +1,69 @@
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import polib
+
+# Файлы меньше этого размера разбираются в одном процессе: запуск воркеров дороже разбора
+PARALLEL_PARSE_MIN_SIZE = 1024 * 1024
+
+def _chunk_ranges(data, chunks):
+    """
+    Делит содержимое PO файла на диапазоны байт по пустым строкам между записями
+    
+    Args:
+        data: Содержимое файла (bytes или mmap)
+        chunks (int): Желаемое число диапазонов
+    """
+    size = len(data)
+    ranges = []
+    start = 0
+    for i in range(1, chunks):
+        boundary = data.find(b'\n\n', max(start, size * i // chunks))
+        if boundary == -1:
+            break
+        boundary += 2
+        ranges.append((start, boundary))
+        start = boundary
+    ranges.append((start, size))
+    return ranges
+
+def _parse_chunk(file_path, start, end, encoding):
+    """Разбирает диапазон байт файла в отдельном процессе"""
+    with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        text = data[start:end].decode(encoding)
+    return polib.pofile(text, encoding=encoding)
+
+def load_po_parallel(file_path, encoding='utf-8', workers=None):
+    """
+    Разбирает большой PO файл параллельно в нескольких процессах
+    
+    Файл делится на части по границам записей, каждая часть разбирается polib
+    в отдельном процессе, затем записи объединяются в исходном порядке.
+    Заголовок и метаданные берутся из первой части.
+    
+    Args:
+        file_path (str): Путь к PO файлу
+        encoding (str): Кодировка файла
+        workers (int): Число процессов (по умолчанию cpu_count - 1)
+    """
+    workers = workers or max(1, (os.cpu_count() or 2) - 1)
+    with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        ranges = _chunk_ranges(data, workers)
+    if len(ranges) == 1:
+        return polib.pofile(file_path, encoding=encoding)
+
+    with ProcessPoolExecutor(max_workers=len(ranges)) as executor:
+        parts = list(executor.map(
+            _parse_chunk,
+            [file_path] * len(ranges),
+            [start for start, _ in ranges],
+            [end for _, end in ranges],
+            [encoding] * len(ranges),
+        ))
+
+    po = parts[0]
+    for part in parts[1:]:
+        po.extend(part)
+    po.fpath = file_path
+    return po
@@ -0,0 +1,50 @@
+import os
+import shutil
+import tempfile
+
+def _header_lines(po):
+    """Комментарий-заголовок PO файла в том же виде, что пишет polib"""
+    for header in po.header.split('\n'):
+        if not header:
+            yield '#\n'
+        elif header[:1] in (',', ':'):
+            yield f'#{header}\n'
+        else:
+            yield f'# {header}\n'
+
+def save_po_streaming(po, file_path):
+    """
+    Сохраняет PO файл по одной записи, не собирая весь каталог в одну строку
+
+    Порядок и формат совпадают с polib.POFile.save: заголовок, метаданные,
+    активные записи, затем устаревшие. Запись идет во временный файл рядом
+    с целевым, который затем атомарно подменяет его через os.replace.
+
+    Args:
+        po (polib.POFile): Каталог для сохранения
+        file_path (str): Путь к файлу
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(file_path)}.", suffix='.tmp', dir=directory)
+    try:
+        with open(fd, 'w', encoding=po.encoding) as f:
+            f.writelines(_header_lines(po))
+            f.write(po.metadata_as_entry().__unicode__(po.wrapwidth))
+            for entry in po:
+                if not entry.obsolete:
+                    f.write('\n')
+                    f.write(entry.__unicode__(po.wrapwidth))
+            for entry in po.obsolete_entries():
+                f.write('\n')
+                f.write(entry.__unicode__(po.wrapwidth))
+        if os.path.exists(file_path):
+            shutil.copymode(file_path, tmp_path)
+        else:
+            # mkstemp создает файл с правами 0600, новому файлу даем обычные права с учетом umask
+            umask = os.umask(0)
+            os.umask(umask)
+            os.chmod(tmp_path, 0o666 & ~umask)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
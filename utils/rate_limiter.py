@@ -0,0 +1,34 @@
+import threading
+import time
+
+class TokenBucket:
+    """
+    Ограничитель частоты "ведро токенов" с лимитом в минуту
+
+    reserve не блокирует: токены списываются сразу (баланс может уйти в минус),
+    а вызывающий получает время ожидания и сам спит через time.sleep или
+    asyncio.sleep. Поэтому одно ведро подходит и потокам, и корутинам.
+    """
+
+    def __init__(self, per_minute):
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+        self.tokens = per_minute
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount=1):
+        """
+        Списывает amount токенов
+
+        Returns:
+            float: Сколько секунд подождать перед запросом (0, если токенов хватает)
+        """
+        # Запрос больше емкости ведра иначе не прошел бы никогда
+        amount = min(amount, self.capacity)
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= amount
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate